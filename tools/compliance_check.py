@@ -30,11 +30,16 @@ ARROW = "→"
 ROUTING_RE = re.compile(r"^\s*(?P<routing>.{2})(?P<rest>.*)$")
 ACTION_RE = re.compile(r"^(?P<action>[cpaqPe])(.*)$")
 TEMP_RE = re.compile(r"τ(\d+)")
-RN_RE = re.compile(r"rn\d+")
-S_RE = re.compile(r"s:\w+|s\d+")
-SHARD_RE = re.compile(r"@s\d+")
-CTAG_RE = re.compile(r"ctag[.:|a-zA-Z0-9_()\-]+")
-DELIV_RE = re.compile(r"[fdrm]\d{2}")
+# Metadata tokens, scanned in one pass. Alternation order matters: the shard (@s#) is tried
+# before the bare session (s#), and ctag.* runs are consumed whole, so each token lands in
+# exactly one bucket.
+META_TOKEN_RE = re.compile(
+    r"(?P<rn>rn\d+)"
+    r"|(?P<shard>@s\d+)"
+    r"|(?P<session>s:\w+|s\d+)"
+    r"|(?P<ctag>ctag[.:|a-zA-Z0-9_()\-]+)"
+    r"|(?P<deliverables>[fdrm]\d{2})"
+)
 
 
 def parse_message(msg: str):
@@ -64,13 +69,9 @@ def parse_message(msg: str):
         meta_tail = rest[1:]
 
     # tokens
-    tokens = {
-        "rn": RN_RE.findall(meta_tail),
-        "session": S_RE.findall(meta_tail),
-        "shard": SHARD_RE.findall(meta_tail),
-        "ctag": CTAG_RE.findall(meta_tail),
-        "deliverables": DELIV_RE.findall(meta_tail),
-    }
+    tokens = {"rn": [], "session": [], "shard": [], "ctag": [], "deliverables": []}
+    for tm in META_TOKEN_RE.finditer(meta_tail):
+        tokens[tm.lastgroup].append(tm.group())
     deadline = None
     t = TEMP_RE.search(meta_tail)
     if t:
@@ -113,32 +114,28 @@ def in_range(x: float, lo: float, hi: float) -> bool:
 
 
 def dp_ok(x: float, max_dp: int) -> bool:
-    s = f"{x}"
-    if "." not in s:
-        return True
-    frac = s.split(".", 1)[1]
-    return len(frac) <= max_dp
+    # round() is correctly rounded, so this is exact: same verdict as checking repr(x)'s decimals
+    return round(x, max_dp) == x
+
+
+def _quantized_sum(vec: list[float]) -> int:
+    """Transmission-quantized vector sum: round(10*axes) + round(100*conf)."""
+    return sum(round(10 * v) for v in vec[:4]) + sum(round(100 * v) for v in vec[4:])
 
 
 def parity_t9(vec: list[float]) -> int:
     """T9+ parity: sum(round(10*axes) + round(100*conf)) % 4."""
     if not vec:
         return 0
-    total = 0
-    for i, v in enumerate(vec):
-        if i < 4:
-            total += round(10 * v)
-        else:
-            total += round(100 * v)
-    return total % 4
-
-
-def parity2b(container_text: str, vec: list[float]) -> int:
-    h = hashlib.sha256(container_text.encode("utf-8")).digest()[0]
-    s = 0
-    if vec:
-        for i, v in enumerate(vec):
-            s += round(10 * v) if i < 4 else round(100 * v)
+    return _quantized_sum(vec) % 4
+
+
+def parity2b(container: str | bytes, vec: list[float]) -> int:
+    # SHA-256 is fixed by the spec (peers must agree); callers validating many vectors
+    # against one container can pass its pre-encoded bytes.
+    data = container if isinstance(container, bytes) else container.encode("utf-8")
+    h = hashlib.sha256(data).digest()[0]
+    s = _quantized_sum(vec) if vec else 0
     return (h ^ (s & 0xFF)) % 4
 
 
@@ -183,6 +180,7 @@ def main():
         "vector": vector,
         "parity": {"t9": pt9, "p2b": p2b},
     }
+    # Raw UTF-8 bytes: the container text (→, τ) prints unescaped regardless of console encoding
     print(json.dumps(report, indent=2))
     sys.exit(0 if report["ok"] else 1)
 
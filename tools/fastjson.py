@@ -0,0 +1,42 @@
+"""
+JSON encode/decode that uses orjson when installed, else the stdlib.
+
+Both backends use compact separators and raw UTF-8 (no \\uXXXX escaping), but the
+text is not identical: orjson writes 1e-05 as 0.00001 and NaN/Infinity as null,
+where the stdlib writes 1e-05 and NaN. Use this for wire payloads and cache files,
+not for output that users diff; those stay on the stdlib json module. Objects orjson
+can't encode (ints beyond 64 bits, non-str keys) fall back to the stdlib. orjson's
+decode errors subclass json.JSONDecodeError, so callers can catch that on either path.
+"""
+
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(s: str | bytes):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def dumps_bytes(obj, indent: bool = False) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an int beyond 64 bits; the stdlib encodes it
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj, indent: bool = False) -> str:
+    return dumps_bytes(obj, indent).decode("utf-8")
@@ -0,0 +1,271 @@
+"""
+Exact-match response cache for provider calls (stdlib sqlite3).
+
+Provider calls are keyed by SHA-256 of (provider, model, system, user). A repeat
+call with the same key returns the stored completion instead of hitting the model,
+so reruns of a batch only pay for lines that changed.
+
+Location: $SHIMMER_CACHE_DIR/llm.sqlite3 (default ~/.cache/shimmer/llm.sqlite3)
+
+Usage (inside tools):
+  from llm_cache import cached
+
+  @cached("ollama")
+  def call_ollama(system_txt, user_txt, model, ...): ...
+
+Disable for a run with llm_cache.disable() (the CLIs expose this as --no-cache).
+Entries older than set_ttl(seconds) are ignored and refreshed (--cache-ttl).
+
+Optional semantic tier (English → Shimmer only): enable_semantic(threshold) embeds
+each English input and reuses a stored Shimmer line for paraphrases whose cosine
+similarity is >= threshold and whose digits match (so "turn 30° left" never reuses
+the line for "turn 45° left"). The embedder is all-MiniLM-L6-v2 via
+sentence-transformers by default, or any Ollama embedding model given as
+"ollama:<name>" (e.g. ollama:nomic-embed-text); both need numpy. Lookups are
+namespaced by embedder/provider/model/prompt template so hints and models never
+bleed into each other. The embedder is only loaded on the first exact-cache miss.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = os.environ.get("SHIMMER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "shimmer")
+
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _digit_key(text: str) -> str:
+    """The digit runs of text, joined: semantic hits require this to match exactly."""
+    return " ".join(_DIGITS_RE.findall(text))
+
+_enabled = True
+_default = None
+_default_lock = threading.Lock()
+_semantic = None
+_semantic_args: tuple | None = None  # (threshold, embed_model) until the tier is first needed
+_semantic_lock = threading.Lock()
+_ttl: int | None = None
+
+
+def cache_key(provider: str, model: str, system_txt: str, user_txt: str) -> str:
+    blob = json.dumps({"p": provider, "m": model, "s": system_txt, "u": user_txt, "t": 0}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Single-file key → completion store, safe to share across threads."""
+
+    def __init__(self, path: str | None = None, max_age: int | None = None):
+        self.path = path or os.path.join(CACHE_DIR, "llm.sqlite3")
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS llm (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)")
+        self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT value, ts FROM llm WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.max_age and row[1] < time.time() - self.max_age):
+            return None
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO llm (key, value, ts) VALUES (?, ?, ?)",
+                             (key, value, int(time.time())))
+            self._db.commit()
+
+    def has(self, provider: str, model: str, system_txt: str, user_txt: str) -> bool:
+        return self.get(cache_key(provider, model, system_txt, user_txt)) is not None
+
+
+def _ollama_embedder(model: str):
+    import urllib.request
+
+    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
+
+    def embed(text: str) -> list[float]:
+        body = json.dumps({"model": model, "input": text}).encode("utf-8")
+        req = urllib.request.Request(host + "/api/embed", data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return json.loads(resp.read().decode("utf-8"))["embeddings"][0]
+    return embed
+
+
+class SemanticCache:
+    """Paraphrase lookup: cosine similarity over normalized sentence embeddings."""
+
+    def __init__(self, threshold: float, path: str | None = None, embed_model: str = SEMANTIC_MODEL,
+                 max_age: int | None = None):
+        import numpy as np
+
+        self._np = np
+        self.threshold = threshold
+        self.embed_model = embed_model
+        self.max_age = max_age
+        self.path = path or os.path.join(CACHE_DIR, "llm.sqlite3")
+        if embed_model.startswith("ollama:"):
+            self._encode = _ollama_embedder(embed_model[len("ollama:"):])
+            self._encode("ping")  # fail now (model not pulled, server down) rather than mid-batch
+        else:
+            from sentence_transformers import SentenceTransformer
+            st = SentenceTransformer(embed_model)
+            self._encode = lambda text: st.encode([text])[0]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS emb (ns TEXT, text TEXT, vec BLOB, value TEXT, ts INTEGER, "
+                         "PRIMARY KEY (ns, text))")
+        if "ts" not in [col[1] for col in self._db.execute("PRAGMA table_info(emb)")]:
+            self._db.execute("ALTER TABLE emb ADD COLUMN ts INTEGER DEFAULT 0")  # cache dirs from before TTLs
+        self._db.commit()
+        # ns -> (matrix of unit vectors, values, timestamps, digit keys); loaded lazily, extended on add()
+        self._mats: dict[str, tuple] = {}
+
+    def _ns(self, ns: str) -> str:
+        # Vectors from different embedders are not comparable; the default keeps its original namespaces
+        return ns if self.embed_model == SEMANTIC_MODEL else f"{self.embed_model}|{ns}"
+
+    def embed(self, text: str):
+        """Unit vector for text; call outside any lock (the ollama: embedder is a network round trip)."""
+        vec = self._np.asarray(self._encode(text), dtype=self._np.float32)
+        norm = float(self._np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def _matrix(self, ns: str):
+        if ns not in self._mats:
+            rows = self._db.execute("SELECT vec, value, ts, text FROM emb WHERE ns = ?", (ns,)).fetchall()
+            if rows:
+                mat = self._np.stack([self._np.frombuffer(v, dtype=self._np.float32) for v, _, _, _ in rows])
+            else:
+                mat = self._np.zeros((0, 0), dtype=self._np.float32)
+            ts = self._np.array([t or 0 for _, _, t, _ in rows], dtype=self._np.int64)
+            digits = self._np.array([_digit_key(t) for _, _, _, t in rows], dtype=str)
+            self._mats[ns] = (mat, [val for _, val, _, _ in rows], ts, digits)
+        return self._mats[ns]
+
+    def lookup(self, ns: str, text: str, vec=None) -> str | None:
+        """Stored value for the closest paraphrase of text; vec is text's embed() if already computed."""
+        ns = self._ns(ns)
+        if vec is None:
+            vec = self.embed(text)
+        with self._lock:
+            mat, values, ts, digits = self._matrix(ns)
+            if not values:
+                return None
+            sims = mat @ vec
+            if self.max_age:
+                sims[ts < time.time() - self.max_age] = -1.0
+            # Embeddings barely move when only a number changes; the stored line would carry the wrong one
+            sims[digits != _digit_key(text)] = -1.0
+            best = int(sims.argmax())
+            return values[best] if sims[best] >= self.threshold else None
+
+    def add(self, ns: str, text: str, value: str, vec=None) -> None:
+        ns = self._ns(ns)
+        if vec is None:
+            vec = self.embed(text)
+        with self._lock:
+            now = int(time.time())
+            exists = self._db.execute("SELECT 1 FROM emb WHERE ns = ? AND text = ?", (ns, text)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO emb (ns, text, vec, value, ts) VALUES (?, ?, ?, ?, ?)",
+                             (ns, text, vec.tobytes(), value, now))
+            self._db.commit()
+            if exists:
+                self._mats.pop(ns, None)  # refreshed an expired entry; reload on next lookup
+            elif ns in self._mats:
+                mat, values, ts, digits = self._mats[ns]
+                mat = self._np.vstack([mat, vec]) if values else vec[None, :]
+                self._mats[ns] = (mat, values + [value], self._np.append(ts, now),
+                                  self._np.append(digits, _digit_key(text)))
+
+
+def get_cache() -> LLMCache:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LLMCache(max_age=_ttl)
+        return _default
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def set_ttl(seconds: int | None) -> None:
+    """Treat entries older than this many seconds as misses (None/0: never expire)."""
+    global _ttl
+    _ttl = seconds or None
+    if _default is not None:
+        _default.max_age = _ttl
+    if _semantic is not None:
+        _semantic.max_age = _ttl
+
+
+def enable_semantic(threshold: float, embed_model: str = SEMANTIC_MODEL) -> bool:
+    """Turn on the paraphrase tier. Returns False (tier stays off) if the embedder's packages are missing.
+
+    Only checks that the packages exist; numpy and the embedder load on the first get_semantic().
+    """
+    global _semantic_args
+    if threshold <= 0 or not _enabled:
+        return False
+    needed = ["numpy"] if embed_model.startswith("ollama:") else ["numpy", "sentence_transformers"]
+    if any(importlib.util.find_spec(name) is None for name in needed):
+        return False
+    _semantic_args = (threshold, embed_model)
+    return True
+
+
+def get_semantic() -> SemanticCache | None:
+    """The paraphrase tier, built on first use; None if it is off or its embedder failed to load."""
+    global _semantic, _semantic_args
+    if not _enabled:
+        return None
+    with _semantic_lock:
+        if _semantic is None and _semantic_args is not None:
+            threshold, embed_model = _semantic_args
+            _semantic_args = None
+            try:
+                _semantic = SemanticCache(threshold, embed_model=embed_model, max_age=_ttl)
+            except (ImportError, OSError):
+                pass
+        return _semantic
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def cached(provider: str):
+    """Decorate fn(system_txt, user_txt, model, ...) -> str with the exact-match cache."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(system_txt: str, user_txt: str, model: str, *args, **kwargs) -> str:
+            if not _enabled:
+                return fn(system_txt, user_txt, model, *args, **kwargs)
+            cache = get_cache()
+            key = cache_key(provider, model, system_txt, user_txt)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+            out = fn(system_txt, user_txt, model, *args, **kwargs)
+            if out and out.strip():  # an empty completion is a failure, not an answer to replay
+                cache.put(key, out)
+            return out
+        return wrapper
+    return deco
@@ -0,0 +1,169 @@
+"""
+OpenAI Batch API helper (stdlib only).
+
+Submits many chat completions as one /v1/batches job (half the per-token price,
+no per-minute request limits) and writes each result into the response cache, so
+the regular per-line code path then completes from cache without network calls.
+
+Flow: build JSONL → POST /files (purpose=batch) → POST /batches → poll
+GET /batches/{id} → GET /files/{output_file_id}/content → route by custom_id.
+
+Each submitted job's id is recorded under $SHIMMER_CACHE_DIR/batches/, keyed by a
+hash of its JSONL, so rerunning the same inputs after an interruption resumes
+polling that job instead of paying for a new one. Inputs over OpenAI's per-file
+limits (50,000 requests / 200 MB) are split into several jobs, each resumable.
+
+Used by shimmer_cli (en2sh --inputs) and the batch tools via --batch-api
+(provider openai only).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import fastjson
+import llm_cache
+from shimmer_cli import openai_chat_payload
+
+TERMINAL = {"completed", "failed", "expired", "cancelled"}
+
+# OpenAI's per-job input file limits (requests per file, file size)
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200_000_000
+
+BATCH_DIR = os.path.join(llm_cache.CACHE_DIR, "batches")
+
+
+def _base_and_key(base_url: str | None, api_key: str | None) -> tuple[str, str]:
+    base = (base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
+    key = api_key or os.environ.get("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY not set")
+    return base, key
+
+
+def _request(method: str, url: str, key: str, data: bytes | None = None, content_type: str | None = None,
+             timeout: int = 120) -> bytes:
+    headers = {"Authorization": f"Bearer {key}"}
+    if content_type:
+        headers["Content-Type"] = content_type
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8', 'ignore')}")
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Network error: {e}")
+
+
+def _upload_jsonl(base: str, key: str, jsonl: bytes) -> str:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"batch.jsonl\"\r\n"
+        f"Content-Type: application/jsonl\r\n\r\n"
+    ).encode("utf-8") + jsonl + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    resp = _request("POST", base + "/files", key, body, f"multipart/form-data; boundary={boundary}")
+    return fastjson.loads(resp)["id"]
+
+
+def _batch_line(cid: str, system_txt: str, user_txt: str, model: str) -> bytes:
+    return fastjson.dumps_bytes({
+        "custom_id": cid,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": openai_chat_payload(system_txt, user_txt, model),
+    })
+
+
+def run_batch(requests: dict[str, tuple[str, str]], model: str, base_url: str | None = None,
+              api_key: str | None = None, poll_max: float = 60.0) -> dict[str, str]:
+    """Complete {custom_id: (system_txt, user_txt)} in one batch job; returns {custom_id: content}."""
+    base, key = _base_and_key(base_url, api_key)
+    lines = [_batch_line(cid, system_txt, user_txt, model) for cid, (system_txt, user_txt) in requests.items()]
+    jsonl = b"\n".join(lines) + b"\n"
+    state_path = os.path.join(BATCH_DIR, hashlib.sha256(base.encode("utf-8") + jsonl).hexdigest()[:32] + ".json")
+
+    batch = None
+    if os.path.exists(state_path):
+        with open(state_path, "rb") as f:
+            batch_id = fastjson.loads(f.read())["id"]
+        batch = fastjson.loads(_request("GET", f"{base}/batches/{batch_id}", key))
+        if batch.get("status") in TERMINAL - {"completed"}:
+            batch = None  # dead job: submit afresh
+        else:
+            print(f"Batch {batch_id} resumed ({len(lines)} requests)", file=sys.stderr)
+    if batch is None:
+        file_id = _upload_jsonl(base, key, jsonl)
+        payload = {"input_file_id": file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"}
+        batch = fastjson.loads(_request("POST", base + "/batches", key, fastjson.dumps_bytes(payload),
+                                        "application/json"))
+        os.makedirs(BATCH_DIR, exist_ok=True)
+        with open(state_path, "wb") as f:
+            f.write(fastjson.dumps_bytes({"id": batch["id"], "model": model, "requests": len(lines)}))
+        print(f"Batch {batch['id']} submitted ({len(lines)} requests)", file=sys.stderr)
+
+    delay = 5.0
+    while batch.get("status") not in TERMINAL:
+        time.sleep(delay)
+        delay = min(delay * 2, poll_max)
+        batch = fastjson.loads(_request("GET", f"{base}/batches/{batch['id']}", key))
+        counts = batch.get("request_counts") or {}
+        print(f"Batch {batch['id']}: {batch.get('status')} "
+              f"{counts.get('completed', 0)}/{counts.get('total', len(lines))}", file=sys.stderr)
+    if batch["status"] != "completed" or not batch.get("output_file_id"):
+        raise RuntimeError(f"Batch {batch['id']} ended with status {batch['status']}")
+
+    out = {}
+    raw = _request("GET", f"{base}/files/{batch['output_file_id']}/content", key)
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        rec = fastjson.loads(line)
+        try:
+            out[rec["custom_id"]] = rec["response"]["body"]["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError):
+            continue  # failed item: the caller falls back to a live call for it
+    os.remove(state_path)
+    return out
+
+
+def _split_jobs(pairs: list[tuple[str, str]], model: str, prefix: str) -> list[dict[str, tuple[str, str]]]:
+    """Split pairs into {custom_id: pair} jobs within OpenAI's per-file request and size limits."""
+    jobs: list[dict[str, tuple[str, str]]] = [{}]
+    size = 0
+    for i, (system_txt, user_txt) in enumerate(pairs):
+        cid = f"{prefix}-{i}"
+        n = len(_batch_line(cid, system_txt, user_txt, model)) + 1
+        if jobs[-1] and (len(jobs[-1]) >= MAX_BATCH_REQUESTS or size + n > MAX_BATCH_BYTES):
+            jobs.append({})
+            size = 0
+        jobs[-1][cid] = (system_txt, user_txt)
+        size += n
+    return jobs
+
+
+def prefetch(pairs: list[tuple[str, str]], model: str, prefix: str = "r") -> int:
+    """Batch-complete (system_txt, user_txt) pairs not yet cached; returns how many were stored."""
+    cache = llm_cache.get_cache()
+    stored = 0
+    # Jobs and custom ids come from the full input, not just the uncached part, so after an
+    # interruption each unfinished job rebuilds the same JSONL and resumes from its own record
+    for job in _split_jobs(list(dict.fromkeys(pairs)), model, prefix):
+        todo = {cid: pair for cid, pair in job.items() if not cache.has("openai", model, *pair)}
+        if not todo:
+            continue
+        for cid, content in run_batch(todo, model).items():
+            if not content:
+                continue  # left uncached: the per-line path makes a live call for it
+            system_txt, user_txt = todo[cid]
+            cache.put(llm_cache.cache_key("openai", model, system_txt, user_txt), content)
+            stored += 1
+    return stored
@@ -0,0 +1,71 @@
+"""
+Client-side request/token rate limiting for provider calls.
+
+A token bucket per dimension (requests per minute, tokens per minute), refilled
+continuously from time.monotonic(). Callers block in acquire() until both buckets
+have capacity, so a batch runs at the provider's published limit instead of
+bursting into 429s and sitting out retry backoff.
+
+Token counts are estimated (~4 characters per token) — close enough to pace TPM
+without a tokenizer dependency.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+# (rpm, tpm) defaults; 0 means unlimited. Local Ollama has no quota.
+PROVIDER_LIMITS = {
+    "openai": (60, 60000),
+    "ollama": (0, 0),
+}
+
+# Completion budget added to each request's prompt estimate
+COMPLETION_TOKENS = 256
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(t) for t in texts) // 4 + COMPLETION_TOKENS
+
+
+class RateLimiter:
+    """Blocking RPM/TPM gate, safe to share across threads."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.available_request_capacity = float(rpm)
+        self.available_token_capacity = float(tpm)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self.available_request_capacity = min(self.rpm, self.available_request_capacity + elapsed * self.rpm / 60)
+        if self.tpm:
+            self.available_token_capacity = min(self.tpm, self.available_token_capacity + elapsed * self.tpm / 60)
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        while True:
+            with self._lock:
+                self._refill()
+                # A single request larger than the whole TPM budget still goes through once the bucket is full
+                need = min(estimated_tokens, self.tpm)
+                req_ok = not self.rpm or self.available_request_capacity >= 1
+                tok_ok = not self.tpm or self.available_token_capacity >= need
+                if req_ok and tok_ok:
+                    if self.rpm:
+                        self.available_request_capacity -= 1
+                    if self.tpm:
+                        self.available_token_capacity -= need
+                    return
+                wait = 0.0
+                if not req_ok:
+                    wait = (1 - self.available_request_capacity) * 60 / self.rpm
+                if not tok_ok:
+                    wait = max(wait, (need - self.available_token_capacity) * 60 / self.tpm)
+            time.sleep(wait)
@@ -5,15 +5,26 @@ Working Shimmer API - Compression/Decompression Service
 
 from flask import Flask, request, jsonify
 import requests
+import functools
 import json
+import os
 import time
 
 app = Flask(__name__)
 
-def compress_with_ollama(english_text):
-    """Compress English to shimmer using local model"""
-    
-    prompt = f"""Convert this English to shimmer format:
+# One keep-alive session for all Ollama calls; the pool is sized for concurrent request threads
+SESSION = requests.Session()
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+OLLAMA_CHAT_URL = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/") + "/api/chat"
+# Point at a fine-tuned model with SHIMMER_API_MODEL. If its Modelfile already carries the
+# Shimmer rules as SYSTEM, set SHIMMER_MODELFILE_SYSTEM=1 so /compress sends only the user text.
+MODEL = os.environ.get("SHIMMER_API_MODEL", "qwen2.5:latest")
+MODELFILE_SYSTEM = os.environ.get("SHIMMER_MODELFILE_SYSTEM") == "1"
+
+# Static instructions go in the system message: Ollama keeps the evaluated prefix cached per
+# loaded model, so only the short user text is processed on each request.
+COMPRESS_SYSTEM = """Convert English to shimmer format.
 
 SHIMMER RULES:
 - Container: <routing><action><metadata><temporal><deliverables>→<vector>
@@ -21,68 +32,128 @@ SHIMMER RULES:
 - Actions: P(plan), q(query), c(complete), a(ack), e(error)
 - Vector: [Action, Subject, Context, Urgency, Confidence] ranges -1.0 to +1.0 (confidence 0.0-1.0)
 
-English: {english_text}
+Reply with the shimmer container only."""
 
-Shimmer (container format only):"""
+DECOMPRESS_SYSTEM = """Translate shimmer messages to plain English.
 
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "qwen2.5:latest",
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.2}
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json().get("response", "").strip()
+RULES:
+- Explain what the message means in simple English
+- Be concise and clear"""
+
+# keep_alive holds the model in memory between requests; a 1k context is ample for these prompts
+CHAT_OPTIONS = {"temperature": 0.2, "num_ctx": 1024}
+
+
+def chat_with_ollama(system, user, num_predict=None, stream=False, stop=None):
+    """One /api/chat turn (system=None defers to the Modelfile SYSTEM); returns the response object"""
+    options = dict(CHAT_OPTIONS)
+    if num_predict:
+        options["num_predict"] = num_predict
+    if stop:
+        options["stop"] = stop
+    messages = [{"role": "user", "content": user}]
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+    return SESSION.post(
+        OLLAMA_CHAT_URL,
+        json={
+            "model": MODEL,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": "30m",
+            "options": options,
+        },
+        stream=stream,
+        timeout=30
+    )
+
+def _container_in(line):
+    """The shimmer container in one line of model output (through the closing ']'), or None"""
+    start = line.find('→[')
+    end = line.find(']', start) if start >= 0 else -1
+    if end < 0:
+        return None
+    found = line[:end + 1].strip()
+    return found if len(found) < 50 else None
+
+class _OllamaUnavailable(Exception):
+    """Ollama failed (non-200, error chunk or empty reply); raised so the LRU never stores fallbacks"""
+
+class _CompressKey:
+    """LRU key for /compress: hashes by case/whitespace-normalized text, carries the original"""
+    __slots__ = ("key", "text")
+
+    def __init__(self, text):
+        self.key = text.strip().lower()
+        self.text = text
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, _CompressKey) and self.key == other.key
+
+@functools.lru_cache(maxsize=4096)
+def _compress_cached(item):
+    # Stream and hang up as soon as a container has closed; the rest would be commentary
+    system = None if MODELFILE_SYSTEM else COMPRESS_SYSTEM
+    response = chat_with_ollama(system, item.text, num_predict=64, stream=True, stop=["\n\n"])
+    result = ""
+    with response:
+        if response.status_code != 200:
+            raise _OllamaUnavailable(response.status_code)
+        for raw in response.iter_lines():
+            if not raw:
+                continue
+            chunk = json.loads(raw)
+            if chunk.get("error"):
+                raise _OllamaUnavailable(chunk["error"])
+            result += chunk.get("message", {}).get("content", "")
             # Extract shimmer format from response
             for line in result.split('\n'):
-                if '→[' in line and len(line) < 50:
-                    return line.strip()
-            
-            # Fallback if no clean format found
-            return result.split('\n')[0].strip()[:50]
-        
+                found = _container_in(line)
+                if found:
+                    return found
+            if chunk.get("done"):
+                break
+
+    # Fallback if no clean format found
+    result = result.strip().split('\n')[0].strip()[:50]
+    if not result:
+        raise _OllamaUnavailable("empty response")
+    return result
+
+# Shimmer is case-sensitive, so only surrounding whitespace is normalized here
+@functools.lru_cache(maxsize=4096)
+def _decompress_cached(shimmer_text):
+    response = chat_with_ollama(DECOMPRESS_SYSTEM, f"SHIMMER: {shimmer_text}")
+    if response.status_code != 200:
+        raise _OllamaUnavailable(response.status_code)
+    body = response.json()
+    if body.get("error"):
+        raise _OllamaUnavailable(body["error"])
+    result = body.get("message", {}).get("content", "").strip()
+    if not result:
+        raise _OllamaUnavailable("empty response")
+    return result
+
+def compress_with_ollama(english_text):
+    """Compress English to shimmer using local model"""
+
+    try:
+        return _compress_cached(_CompressKey(english_text))
+    except _OllamaUnavailable:
         return f"ABP→[0.5,0.5,0.0,0.5,0.85]"  # Default fallback
-        
     except Exception as e:
         return f"ABP→[0.5,0.5,0.0,0.5,0.85]"  # Error fallback
 
 def decompress_with_ollama(shimmer_text):
     """Decompress shimmer to English using local model"""
-    
-    prompt = f"""Translate this shimmer message to plain English:
-
-SHIMMER: {shimmer_text}
-
-RULES:
-- Explain what the message means in simple English
-- Be concise and clear
-
-English meaning:"""
 
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate", 
-            json={
-                "model": "qwen2.5:latest",
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.2}
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json().get("response", "").strip()
-            return result
-        
+        return _decompress_cached(shimmer_text.strip())
+    except _OllamaUnavailable:
         return "Translation not available"
-        
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -188,6 +259,21 @@ def demo_page():
     </html>
     """
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the in-process result caches"""
+    return jsonify({
+        "compress": _compress_cached.cache_info()._asdict(),
+        "decompress": _decompress_cached.cache_info()._asdict(),
+    })
+
+@app.route('/cache/clear', methods=['POST'])
+def cache_clear():
+    """Drop all cached results (e.g. after changing MODEL or the prompts)"""
+    _compress_cached.cache_clear()
+    _decompress_cached.cache_clear()
+    return jsonify({"status": "cleared"})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -199,6 +285,15 @@ if __name__ == '__main__':
     print("Endpoints:")
     print("  POST /compress - English → Shimmer")
     print("  POST /decompress - Shimmer → English")
+    print("  GET /cache/stats - Result cache counters")
+    print("  POST /cache/clear - Empty result caches")
     print("  GET /health - Status check")
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Handlers mostly wait on Ollama, so serve requests on a thread pool; no debugger/reloader
+    threads = int(os.environ.get("SHIMMER_THREADS", "16"))
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host='0.0.0.0', port=5000, threaded=True)
+    else:
+        serve(app, host='0.0.0.0', port=5000, threads=threads)
\ No newline at end of file
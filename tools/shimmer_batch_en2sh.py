@@ -12,6 +12,9 @@ Usage:
 Notes:
 - Keep each line to one coherent instruction/statement. If you need multiple messages, use multiple lines.
 - You can set defaults for routing/action/deadline/session/deliverables via flags.
+- With --provider openai, --batch-api submits all lines as one OpenAI Batch job (half price, slower turnaround).
+- Provider calls run in parallel (--concurrency, default 4); output order always matches input order.
+- --pack K sends K lines per request to stretch a requests-per-minute quota.
 """
 
 from __future__ import annotations
@@ -19,21 +22,28 @@ from __future__ import annotations
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 TOOLS = os.path.join(ROOT, "tools")
 if TOOLS not in sys.path:
     sys.path.append(TOOLS)
 
+import llm_cache
 from shimmer_cli import (
-    read_prompt_sections,
+    load_system_prompt,
+    set_rate_limit,
     build_authoring_prompt,
-    call_ollama,
-    call_openai,
-    extract_container_line,
+    author_shimmer,
+    author_shimmer_packed,
 )
 
 
+# Flush + fsync the output every N converted lines so an interrupted run keeps its progress
+SYNC_EVERY = 64
+
+
 def main():
     ap = argparse.ArgumentParser(description="Batch translate English .txt to .shimmer (text containers)")
     ap.add_argument("--in", dest="inp", required=True)
@@ -45,38 +55,99 @@ def main():
     ap.add_argument("--deadline", type=int, default=None)
     ap.add_argument("--deliver", action="append", default=None, help="e.g., f01 (repeatable)")
     ap.add_argument("--session", default=None)
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("SHIMMER_CONCURRENCY", "4")),
+                    help="parallel provider calls (default 4, or $SHIMMER_CONCURRENCY)")
+    ap.add_argument("--rpm", type=int, default=None, help="max requests/minute (default: 60 for openai, unlimited for ollama; 0 = unlimited)")
+    ap.add_argument("--tpm", type=int, default=None, help="max tokens/minute (default: 60000 for openai, unlimited for ollama; 0 = unlimited)")
+    ap.add_argument("--no-cache", action="store_true", help="bypass the on-disk response cache")
+    ap.add_argument("--cache-ttl", type=int, default=None, metavar="SECONDS",
+                    help="treat cached responses older than this as misses")
+    ap.add_argument("--semantic-cache-threshold", type=float, default=0.92,
+                    help="reuse cached output for paraphrases at this cosine similarity (needs numpy + an embedder; 0 disables)")
+    ap.add_argument("--semantic-cache-model", default=llm_cache.SEMANTIC_MODEL,
+                    help="sentence-transformers model, or ollama:<name> (e.g. ollama:nomic-embed-text)")
+    ap.add_argument("--batch-api", action="store_true",
+                    help="openai only: complete all lines via the Batch API first (results land in the cache)")
+    ap.add_argument("--pack", type=int, default=1,
+                    help="send K lines per request (saves RPM; falls back to single lines if the reply doesn't split)")
     args = ap.parse_args()
+    if args.batch_api and args.pack > 1:
+        ap.error("--pack cannot be combined with --batch-api")
+    if args.batch_api and (args.provider != "openai" or args.no_cache):
+        ap.error("--batch-api requires --provider openai and the response cache (drop --no-cache)")
+    if args.no_cache:
+        llm_cache.disable()
+    llm_cache.set_ttl(args.cache_ttl)
+    set_rate_limit(args.provider, args.rpm, args.tpm)
+    llm_cache.enable_semantic(args.semantic_cache_threshold, args.semantic_cache_model)
+
+    system_txt = load_system_prompt()
+
+    def convert(line: str) -> str:
+        return author_shimmer(
+            system_txt,
+            english_text=line,
+            provider=args.provider,
+            model=args.model,
+            routing=args.routing,
+            action=args.action,
+            deadline=args.deadline,
+            deliver=args.deliver,
+            session=args.session,
+        )
+
+    def convert_packed(chunk: list[str]) -> list[str]:
+        return author_shimmer_packed(
+            system_txt,
+            english_texts=chunk,
+            provider=args.provider,
+            model=args.model,
+            routing=args.routing,
+            action=args.action,
+            deadline=args.deadline,
+            deliver=args.deliver,
+            session=args.session,
+        )
+
+    with open(args.inp, "r", encoding="utf-8") as fin:
+        lines = [raw.rstrip("\n") for raw in fin]
+    todo = [line for line in lines if line.strip()]
+    # Repeated lines cost one provider call; every occurrence still gets its output line
+    unique = list(dict.fromkeys(todo))
 
-    sections = read_prompt_sections(os.path.join(ROOT, "LLM_Prompt_Template.md"))
-    system_txt = sections.get("System (Common)") or sections.get("System") or "You are a strict Shimmer protocol agent."
+    if args.batch_api:
+        import openai_batch
+        pairs = [build_authoring_prompt(system_txt, line, args.routing, args.action, args.deadline,
+                                        args.deliver, args.session) for line in unique]
+        openai_batch.prefetch(pairs, args.model, prefix="t")
 
-    total = 0
+    total = len(todo)
     converted = 0
-    with open(args.inp, "r", encoding="utf-8") as fin, open(args.out, "w", encoding="utf-8") as fout:
-        for raw in fin:
-            line = raw.rstrip("\n")
+    # Provider calls are network-bound, so threads overlap the round trips.
+    # ex.map yields in submission order, which keeps output aligned with input.
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex, \
+            open(args.out, "w", encoding="utf-8") as fout:
+        if args.pack > 1:
+            chunks = [unique[i:i + args.pack] for i in range(0, len(unique), args.pack)]
+            results = chain.from_iterable(ex.map(convert_packed, chunks))
+        else:
+            results = ex.map(convert, unique)
+        done: dict[str, str] = {}
+        for line in lines:
             if not line.strip():
                 fout.write("\n")
                 continue
-            total += 1
-            sys_txt, usr_txt = build_authoring_prompt(
-                system_txt,
-                english_text=line,
-                routing=args.routing,
-                action=args.action,
-                deadline=args.deadline,
-                deliver=args.deliver,
-                session=args.session,
-            )
-            if args.provider == "ollama":
-                out = call_ollama(sys_txt, usr_txt, model=args.model)
-            else:
-                out = call_openai(sys_txt, usr_txt, model=args.model)
-            cont = extract_container_line(out)
-            fout.write(cont + "\n")
+            # unique is in first-occurrence order, so a new line is always the next result
+            if line not in done:
+                done[line] = next(results)
+            fout.write(done[line] + "\n")
             converted += 1
+            if converted % SYNC_EVERY == 0:
+                fout.flush()
+                os.fsync(fout.fileno())
 
-    print(f"Processed: {total}, converted: {converted}")
+    print(f"Processed: {total}, converted: {converted}, unique: {len(unique)} "
+          f"({total - len(unique)} duplicate lines reused)")
 
 
 if __name__ == "__main__":
@@ -16,29 +16,42 @@ Usage:
 Notes:
 - Lines containing only Base64 binary are currently skipped with a warning.
 - For maximum privacy/cost control, prefer a local model via --provider ollama.
+- Provider calls run in parallel (--concurrency, default 4); output order always matches input order.
+- --pack K glosses K lines per request (one JSON array back) to stretch a requests-per-minute quota.
+- With --provider openai, --batch-api submits all lines as one OpenAI Batch job (half price, slower turnaround).
 """
 
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 TOOLS = os.path.join(ROOT, "tools")
 if TOOLS not in sys.path:
     sys.path.append(TOOLS)
 
+import llm_cache
 # Reuse prompt reading and provider calls from shimmer_cli
 from shimmer_cli import (
-    read_prompt_sections,
+    load_system_prompt,
+    set_rate_limit,
     build_glossing_prompt,
-    call_ollama,
-    call_openai,
+    call_provider,
     extract_json,
+    gloss_shimmer_packed,
+    parse_json_object,
 )
 
 
+# Flush + fsync the output every N converted lines so an interrupted run keeps its progress
+SYNC_EVERY = 64
+
+
 def looks_like_text_shimmer(line: str) -> bool:
     return "→[" in line and line.strip().endswith("]")
 
@@ -49,18 +62,68 @@ def main():
     ap.add_argument("--out", dest="out", required=True)
     ap.add_argument("--provider", choices=["ollama", "openai"], default="ollama")
     ap.add_argument("--model", default="qwen2.5:latest")
+    ap.add_argument("--concurrency", type=int, default=int(os.environ.get("SHIMMER_CONCURRENCY", "4")),
+                    help="parallel provider calls (default 4, or $SHIMMER_CONCURRENCY)")
+    ap.add_argument("--rpm", type=int, default=None, help="max requests/minute (default: 60 for openai, unlimited for ollama; 0 = unlimited)")
+    ap.add_argument("--tpm", type=int, default=None, help="max tokens/minute (default: 60000 for openai, unlimited for ollama; 0 = unlimited)")
+    ap.add_argument("--no-cache", action="store_true", help="bypass the on-disk response cache")
+    ap.add_argument("--cache-ttl", type=int, default=None, metavar="SECONDS",
+                    help="treat cached responses older than this as misses")
+    ap.add_argument("--batch-api", action="store_true",
+                    help="openai only: complete all lines via the Batch API first (results land in the cache)")
+    ap.add_argument("--pack", type=int, default=1,
+                    help="gloss K lines per request as a JSON array (falls back to single lines on a count mismatch)")
     args = ap.parse_args()
-
-    sections = read_prompt_sections(os.path.join(ROOT, "LLM_Prompt_Template.md"))
-    system_txt = sections.get("System (Common)") or sections.get("System") or "You are a strict Shimmer protocol agent."
+    if args.batch_api and args.pack > 1:
+        ap.error("--pack cannot be combined with --batch-api")
+    if args.batch_api and (args.provider != "openai" or args.no_cache):
+        ap.error("--batch-api requires --provider openai and the response cache (drop --no-cache)")
+    if args.no_cache:
+        llm_cache.disable()
+    llm_cache.set_ttl(args.cache_ttl)
+    set_rate_limit(args.provider, args.rpm, args.tpm)
+
+    system_txt = load_system_prompt()
+
+    def gloss(line: str) -> str:
+        sys_txt, usr_txt = build_glossing_prompt(system_txt, shimmer_msg=line)
+        out = call_provider(args.provider, sys_txt, usr_txt, args.model)
+        # extract one_paragraph if present, else dump JSON
+        j = parse_json_object(out)
+        para = j.get("one_paragraph") if j else None
+        return (para or extract_json(out)).strip()
+
+    def gloss_packed(chunk: list[str]) -> list[str]:
+        objs = gloss_shimmer_packed(system_txt, chunk, args.provider, args.model)
+        if objs is None:
+            return [gloss(line) for line in chunk]
+        return [(obj.get("one_paragraph") or json.dumps(obj, ensure_ascii=False)).strip() for obj in objs]
+
+    with open(args.inp, "r", encoding="utf-8") as fin:
+        lines = [raw.strip() for raw in fin]
+    todo = [line for line in lines if line and looks_like_text_shimmer(line)]
+    # Repeated lines cost one provider call; every occurrence still gets its output line
+    unique = list(dict.fromkeys(todo))
+
+    if args.batch_api:
+        import openai_batch
+        pairs = [build_glossing_prompt(system_txt, shimmer_msg=line) for line in unique]
+        openai_batch.prefetch(pairs, args.model, prefix="g")
 
     total = 0
     converted = 0
     skipped = 0
-
-    with open(args.inp, "r", encoding="utf-8") as fin, open(args.out, "w", encoding="utf-8") as fout:
-        for raw in fin:
-            line = raw.strip()
+    # Provider calls are network-bound, so threads overlap the round trips.
+    # ex.map yields in submission order, which keeps output aligned with input.
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex, \
+            open(args.out, "w", encoding="utf-8") as fout:
+        if args.pack > 1:
+            chunks = [unique[i:i + args.pack] for i in range(0, len(unique), args.pack)]
+            results = chain.from_iterable(ex.map(gloss_packed, chunks))
+        else:
+            results = ex.map(gloss, unique)
+        done: dict[str, str] = {}
+        for line in lines:
             if not line:
                 fout.write("\n")
                 continue
@@ -69,24 +132,17 @@ def main():
                 skipped += 1
                 fout.write("[skipped non-text shimmer line]\n")
                 continue
-            sys_txt, usr_txt = build_glossing_prompt(system_txt, shimmer_msg=line)
-            if args.provider == "ollama":
-                out = call_ollama(sys_txt, usr_txt, model=args.model)
-            else:
-                out = call_openai(sys_txt, usr_txt, model=args.model)
-            js = extract_json(out)
-            # extract one_paragraph if present, else dump JSON
-            para = None
-            try:
-                import json
-                j = json.loads(js)
-                para = j.get("one_paragraph")
-            except Exception:
-                pass
-            fout.write((para or js).strip() + "\n")
+            # unique is in first-occurrence order, so a new line is always the next result
+            if line not in done:
+                done[line] = next(results)
+            fout.write(done[line] + "\n")
             converted += 1
+            if converted % SYNC_EVERY == 0:
+                fout.flush()
+                os.fsync(fout.fileno())
 
-    print(f"Processed: {total}, converted: {converted}, skipped: {skipped}")
+    print(f"Processed: {total}, converted: {converted}, skipped: {skipped}, unique: {len(unique)} "
+          f"({len(todo) - len(unique)} duplicate lines reused)")
 
 
 if __name__ == "__main__":
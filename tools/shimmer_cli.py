@@ -9,38 +9,173 @@ Commands:
   - sh2en: Shimmer → English (returns compact JSON gloss)
 
 Providers:
-  - ollama  (default host http://localhost:11434)
-  - openai  (needs OPENAI_API_KEY)
+  - ollama   (default host http://localhost:11434)
+  - openai   (needs OPENAI_API_KEY)
+  - bedrock  (Anthropic models on AWS Bedrock; needs boto3 and AWS credentials)
+
+Responses are cached on disk by (provider, model, prompt); pass --no-cache to force a fresh call.
+On a fresh call the raw model output is echoed to stderr as it streams in; pass --no-stream to turn that off.
 
 Examples:
   shimmer-cli en2sh "Plan dataset 03 in 30 minutes" \
     --provider ollama --model qwen2.5:latest --routing AB --deadline 1800
 
+  shimmer-cli en2sh --inputs requests.txt --provider openai --model gpt-4o-mini --concurrency 16
+  shimmer-cli en2sh --inputs requests.txt --provider openai --model gpt-4o-mini --batch-api
+
   shimmer-cli sh2en "ABPrn02τ1800d03→[0.5,0.6,0.5,0.9,0.92]" \
     --provider openai --model gpt-4o-mini
+
+  shimmer-cli en2sh "Plan dataset 03 in 30 minutes" --provider bedrock --region us-east-1
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import os
 import re
 import sys
-import urllib.request
-import urllib.error
+import threading
+import urllib.parse
+from typing import TYPE_CHECKING
+
+import fastjson
+import llm_cache
+from llm_cache import cached
+from rate_limit import PROVIDER_LIMITS, RateLimiter, estimate_tokens
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 PROMPT_PATH = os.path.join(ROOT, "LLM_Prompt_Template.md")
 
+_JSON_DECODER = json.JSONDecoder()
+_JSON_BLOCK_RE = re.compile(r"\{[\s\S]*\}")
+# Start of an array of objects; a bare "[" also matches echoed vectors and "[Note]" preambles
+_JSON_ARRAY_START_RE = re.compile(r"\[\s*\{")
+
+DEFAULT_MODEL = "qwen2.5:latest"
+BEDROCK_DEFAULT_MODEL = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+
+# Bedrock request settings; main() sets the region from --region
+_BEDROCK = {"region": None, "latency": "optimized"}
+
+# provider -> RateLimiter; empty unless a batch tool calls set_rate_limit()
+_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def set_rate_limit(provider: str, rpm: int | None = None, tpm: int | None = None) -> None:
+    """Pace live calls to a provider; None falls back to rate_limit.PROVIDER_LIMITS, 0 means unlimited."""
+    d_rpm, d_tpm = PROVIDER_LIMITS.get(provider, (0, 0))
+    rpm = d_rpm if rpm is None else rpm
+    tpm = d_tpm if tpm is None else tpm
+    if rpm or tpm:
+        _LIMITERS[provider] = RateLimiter(rpm, tpm)
+    else:
+        _LIMITERS.pop(provider, None)
+
+
+def _throttle(provider: str, system_txt: str, user_txt: str) -> None:
+    limiter = _LIMITERS.get(provider)
+    if limiter is not None:
+        limiter.acquire(estimate_tokens(system_txt, user_txt))
+
+
+# Per-thread keep-alive connections, keyed by (scheme, host:port). http.client connections
+# are not thread-safe, so each batch worker thread gets its own pool.
+# http.client/urllib.request (and the ssl/email modules they pull in) are imported on first
+# network use, so cache hits and --help don't pay for them at startup.
+_conns = threading.local()
+
+if TYPE_CHECKING:
+    import http.client
+
+
+def _pooled_connection(scheme: str, netloc: str, timeout: int) -> "http.client.HTTPConnection":
+    import http.client
+
+    pool = getattr(_conns, "pool", None)
+    if pool is None:
+        pool = _conns.pool = {}
+    conn = pool.get((scheme, netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = pool[(scheme, netloc)] = cls(netloc, timeout=timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _drop_connection(scheme: str, netloc: str) -> None:
+    conn = getattr(_conns, "pool", {}).pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+def _urllib_post(url: str, data: bytes, headers: dict, timeout: int) -> bytes:
+    import urllib.error
+    import urllib.request
+
+    req = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.read()
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8', 'ignore')}")
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Network error: {e}")
+
 
 def http_post(url: str, payload: dict, headers: dict, timeout: int = 60) -> dict:
-    data = json.dumps(payload).encode("utf-8")
+    import http.client
+    import urllib.request
+
+    data = fastjson.dumps_bytes(payload)
+    headers = {"Content-Type": "application/json", **headers}
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or (
+            parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.hostname or "")):
+        # Proxied (or unusual) URLs keep urllib's proxy handling; no connection reuse
+        return fastjson.loads(_urllib_post(url, data, headers, timeout))
+
+    path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+    for attempt in range(2):
+        conn = _pooled_connection(parts.scheme, parts.netloc, timeout)
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", path, body=data, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            _drop_connection(parts.scheme, parts.netloc)
+            if reused and attempt == 0:
+                continue  # server closed an idle keep-alive socket; retry once on a fresh one
+            raise RuntimeError(f"Network error: {e}")
+        except (OSError, http.client.HTTPException) as e:
+            _drop_connection(parts.scheme, parts.netloc)
+            raise RuntimeError(f"Network error: {e}")
+        if resp.will_close:
+            _drop_connection(parts.scheme, parts.netloc)
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status}: {body.decode('utf-8', 'ignore')}")
+        return fastjson.loads(body)
+    raise RuntimeError("Network error: connection retry failed")
+
+
+def http_stream(url: str, payload: dict, headers: dict, timeout: int = 60):
+    """POST and yield the response body line by line (NDJSON / SSE) as it arrives."""
+    import urllib.error
+    import urllib.request
+
+    data = fastjson.dumps_bytes(payload)
     req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json", **headers})
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read()
-            return json.loads(body.decode("utf-8"))
+            for raw in resp:
+                line = raw.decode("utf-8").strip()
+                if line:
+                    yield line
     except urllib.error.HTTPError as e:
         raise RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8', 'ignore')}")
     except urllib.error.URLError as e:
@@ -48,6 +183,12 @@ def http_post(url: str, payload: dict, headers: dict, timeout: int = 60) -> dict
 
 
 def read_prompt_sections(path: str) -> dict:
+    # Memoized on (path, mtime): repeat calls skip the re-read, edits to the template still apply
+    return dict(_parse_prompt_sections(path, os.path.getmtime(path)))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_prompt_sections(path: str, mtime: float) -> dict:
     text = open(path, "r", encoding="utf-8").read()
     sections = {}
     cur = None
@@ -66,11 +207,38 @@ def read_prompt_sections(path: str) -> dict:
     return sections
 
 
+def load_system_prompt(path: str = PROMPT_PATH) -> str:
+    sections = read_prompt_sections(path)
+    return sections.get("System (Common)") or sections.get("System") or "You are a strict Shimmer protocol agent."
+
+
+# Static prompt text, kept in module constants so the builders are a single f-string each
+_AUTH_HEAD = ("Instruction: Convert the English request into a Shimmer text container and a T9+ vector per the spec. "
+              "Use 1 decimal for the first 4 axes. Include Confidence in [0,1]. "
+              "Output ONLY the container and vector on a single line.\n"
+              "\nInput:\n\"\"\"\n")
+# keep one concise example
+_AUTH_TAIL = ("\n\nFew-shot example:\n"
+              "EN: Plan to deliver dataset 03 in 30 minutes; technical task; high urgency.\n"
+              "OUT: ABPrn02τ1800d03→[0.5,0.6,0.5,0.9,0.92]\n"
+              "\nNow convert the input.")
+_GLOSS_HEAD = ("Instruction: Read a Shimmer text container with vector and produce a concise English gloss that "
+               "explains routing, action, metadata, deadline (if any), deliverables, and the vector meaning. "
+               "Keep it to one short paragraph.\n"
+               "\nInput:\n")
+_GLOSS_TAIL = ("\n\nOutput keys:\n"
+               "- routing: source→dest\n"
+               "- action: code + meaning\n"
+               "- metadata: list\n"
+               "- deadline_seconds: number or none\n"
+               "- deliverables: list\n"
+               "- vector_gloss: short plain-English summary of action/subject/context/urgency with confidence\n"
+               "- one_paragraph: fluent 1–2 sentences suitable for humans\n"
+               "\nReturn a compact JSON object with those keys.")
+
+
 def build_authoring_prompt(system_txt: str, english_text: str, routing: str | None, action: str | None,
                             deadline: int | None, deliver: list[str] | None, session: str | None) -> tuple[str, str]:
-    user = []
-    user.append("Instruction: Convert the English request into a Shimmer text container and a T9+ vector per the spec. Use 1 decimal for the first 4 axes. Include Confidence in [0,1]. Output ONLY the container and vector on a single line.")
-    user.append("\nInput:\n\"\"\"\n" + english_text + "\n\"\"\"")
     hints = []
     if routing:
         hints.append(f"routing: {routing}")
@@ -82,32 +250,44 @@ def build_authoring_prompt(system_txt: str, english_text: str, routing: str | No
         hints.append(f"deliverables: {' '.join(deliver)}")
     if session:
         hints.append(f"session: {session}")
-    if hints:
-        user.append("\nOptional hints:\n- " + "\n- ".join(hints))
-    # keep one concise example
-    user.append("\nFew-shot example:\nEN: Plan to deliver dataset 03 in 30 minutes; technical task; high urgency.\nOUT: ABPrn02τ1800d03→[0.5,0.6,0.5,0.9,0.92]\n\nNow convert the input.")
-    return system_txt, "\n".join(user)
+    hints_block = "\n\nOptional hints:\n- " + "\n- ".join(hints) if hints else ""
+    return system_txt, f'{_AUTH_HEAD}{english_text}\n"""{hints_block}{_AUTH_TAIL}'
 
 
 def build_glossing_prompt(system_txt: str, shimmer_msg: str) -> tuple[str, str]:
-    user = []
-    user.append("Instruction: Read a Shimmer text container with vector and produce a concise English gloss that explains routing, action, metadata, deadline (if any), deliverables, and the vector meaning. Keep it to one short paragraph.")
-    user.append("\nInput:\n" + shimmer_msg)
-    user.append("\nOutput keys:\n- routing: source→dest\n- action: code + meaning\n- metadata: list\n- deadline_seconds: number or none\n- deliverables: list\n- vector_gloss: short plain-English summary of action/subject/context/urgency with confidence\n- one_paragraph: fluent 1–2 sentences suitable for humans\n\nReturn a compact JSON object with those keys.")
-    return system_txt, "\n".join(user)
+    return system_txt, f"{_GLOSS_HEAD}{shimmer_msg}{_GLOSS_TAIL}"
 
 
-def call_ollama(system_txt: str, user_txt: str, model: str, host: str | None = None) -> str:
+@cached("ollama")
+def call_ollama(system_txt: str, user_txt: str, model: str, host: str | None = None, on_token=None) -> str:
+    """on_token(text) receives pieces as they are generated (streamed request); the full reply is still returned."""
     base = host or os.environ.get("OLLAMA_HOST", "http://localhost:11434")
     url = base.rstrip("/") + "/api/chat"
     payload = {
         "model": model,
-        "stream": False,
+        "stream": on_token is not None,
         "messages": [
             {"role": "system", "content": system_txt},
             {"role": "user", "content": user_txt},
         ],
     }
+    _throttle("ollama", system_txt, user_txt)
+    if on_token is not None:
+        pieces = []
+        for line in http_stream(url, payload, headers={}):
+            chunk = fastjson.loads(line)
+            if chunk.get("error"):
+                raise RuntimeError(f"Ollama error: {chunk['error']}")
+            piece = (chunk.get("message") or {}).get("content", "")
+            if piece:
+                pieces.append(piece)
+                on_token(piece)
+            if chunk.get("done"):
+                break
+        out = "".join(pieces).strip()
+        if not out:
+            raise RuntimeError("Empty Ollama response")
+        return out
     resp = http_post(url, payload, headers={})
     if "message" in resp and isinstance(resp["message"], dict):
         return resp["message"].get("content", "").strip()
@@ -118,13 +298,8 @@ def call_ollama(system_txt: str, user_txt: str, model: str, host: str | None = N
     raise RuntimeError("Unexpected Ollama response")
 
 
-def call_openai(system_txt: str, user_txt: str, model: str, base_url: str | None = None, api_key: str | None = None) -> str:
-    base = (base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
-    key = api_key or os.environ.get("OPENAI_API_KEY")
-    if not key:
-        raise RuntimeError("OPENAI_API_KEY not set")
-    url = base + "/chat/completions"
-    payload = {
+def openai_chat_payload(system_txt: str, user_txt: str, model: str) -> dict:
+    return {
         "model": model,
         "messages": [
             {"role": "system", "content": system_txt},
@@ -132,6 +307,44 @@ def call_openai(system_txt: str, user_txt: str, model: str, base_url: str | None
         ],
         "temperature": 0,
     }
+
+
+@cached("openai")
+def call_openai(system_txt: str, user_txt: str, model: str, base_url: str | None = None, api_key: str | None = None,
+                on_token=None) -> str:
+    base = (base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/")
+    key = api_key or os.environ.get("OPENAI_API_KEY")
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY not set")
+    url = base + "/chat/completions"
+    payload = openai_chat_payload(system_txt, user_txt, model)
+    _throttle("openai", system_txt, user_txt)
+    if on_token is not None:
+        # Server-sent events: "data: {chunk}" frames, terminated by "data: [DONE]"
+        pieces = []
+        for line in http_stream(url, {**payload, "stream": True}, headers={"Authorization": f"Bearer {key}"}):
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                frame = fastjson.loads(data)
+            except ValueError:
+                continue
+            if isinstance(frame, dict) and frame.get("error"):
+                raise RuntimeError(f"OpenAI error: {frame['error']}")
+            try:
+                piece = frame["choices"][0]["delta"].get("content") or ""
+            except (KeyError, IndexError, TypeError):
+                continue
+            if piece:
+                pieces.append(piece)
+                on_token(piece)
+        out = "".join(pieces).strip()
+        if not out:
+            raise RuntimeError("Empty OpenAI response")
+        return out
     resp = http_post(url, payload, headers={"Authorization": f"Bearer {key}"})
     try:
         return resp["choices"][0]["message"]["content"].strip()
@@ -139,6 +352,142 @@ def call_openai(system_txt: str, user_txt: str, model: str, base_url: str | None
         raise RuntimeError(f"Unexpected OpenAI response: {e}: {resp}")
 
 
+def set_bedrock_region(region: str | None) -> None:
+    """AWS region for --provider bedrock; None uses the boto3 default (AWS_DEFAULT_REGION / profile)."""
+    _BEDROCK["region"] = region
+
+
+@functools.lru_cache(maxsize=4)
+def _bedrock_client(region: str | None):
+    try:
+        import boto3
+    except ImportError:
+        raise RuntimeError("--provider bedrock needs boto3 (pip install boto3)")
+    return boto3.client("bedrock-runtime", region_name=region)
+
+
+@cached("bedrock")
+def call_bedrock(system_txt: str, user_txt: str, model: str, on_token=None) -> str:
+    """Anthropic Messages API on Bedrock, latency-optimized inference (falls back to standard where unsupported)."""
+    body = fastjson.dumps_bytes({
+        "anthropic_version": "bedrock-2023-05-31",
+        "system": system_txt,
+        "messages": [{"role": "user", "content": user_txt}],
+        "max_tokens": 512,
+        "temperature": 0,
+    })
+    client = _bedrock_client(_BEDROCK["region"])
+    _throttle("bedrock", system_txt, user_txt)
+    request = dict(modelId=model, body=body, contentType="application/json", accept="application/json",
+                   performanceConfigLatency=_BEDROCK["latency"])
+    try:
+        if on_token is None:
+            resp = client.invoke_model(**request)
+        else:
+            resp = client.invoke_model_with_response_stream(**request)
+    except client.exceptions.ValidationException as e:
+        if _BEDROCK["latency"] == "standard":
+            raise RuntimeError(f"Bedrock error: {e}")
+        # Latency-optimized inference is only offered for some models/regions; retry as standard
+        _BEDROCK["latency"] = "standard"
+        return call_bedrock.__wrapped__(system_txt, user_txt, model, on_token)
+    except Exception as e:
+        raise RuntimeError(f"Bedrock error: {e}")
+
+    if on_token is None:
+        out = fastjson.loads(resp["body"].read())
+        return "".join(block.get("text", "") for block in out.get("content", [])).strip()
+    pieces = []
+    for event in resp["body"]:
+        chunk = event.get("chunk")
+        if not chunk:
+            # Any other event is an exception (throttling, modelStreamError, ...) ending the stream
+            raise RuntimeError(f"Bedrock error: {event}")
+        data = fastjson.loads(chunk["bytes"])
+        if data.get("type") == "error":
+            raise RuntimeError(f"Bedrock error: {data.get('error')}")
+        if data.get("type") == "content_block_delta":
+            piece = data.get("delta", {}).get("text", "")
+            if piece:
+                pieces.append(piece)
+                on_token(piece)
+    out = "".join(pieces).strip()
+    if not out:
+        raise RuntimeError("Empty Bedrock response")
+    return out
+
+
+def call_provider(provider: str, system_txt: str, user_txt: str, model: str, on_token=None) -> str:
+    if provider == "ollama":
+        return call_ollama(system_txt, user_txt, model=model, on_token=on_token)
+    if provider == "bedrock":
+        return call_bedrock(system_txt, user_txt, model=model, on_token=on_token)
+    return call_openai(system_txt, user_txt, model=model, on_token=on_token)
+
+
+def author_shimmer(system_txt: str, english_text: str, provider: str, model: str, routing: str | None = None,
+                   action: str | None = None, deadline: int | None = None, deliver: list[str] | None = None,
+                   session: str | None = None, on_token=None) -> str:
+    """English → one Shimmer line via the Authoring Template (exact + optional semantic cache)."""
+    sys_txt, usr_txt = build_authoring_prompt(system_txt, english_text, routing, action, deadline, deliver, session)
+    sem = None
+    if llm_cache.enabled() and not llm_cache.get_cache().has(provider, model, sys_txt, usr_txt):
+        sem = llm_cache.get_semantic()  # the embedder loads on the first exact-cache miss
+    if sem is not None:
+        # Namespace by the prompt template with the input blanked out, so paraphrase hits
+        # only match entries authored with the same provider, model, and hints.
+        _, template = build_authoring_prompt(system_txt, "", routing, action, deadline, deliver, session)
+        ns = llm_cache.cache_key(provider, model, sys_txt, template)
+        vec = sem.embed(english_text)  # once, for both the lookup and the add
+        hit = sem.lookup(ns, english_text, vec)
+        if hit is not None:
+            return hit
+        line = extract_container_line(call_provider(provider, sys_txt, usr_txt, model, on_token))
+        if line.strip() and "→[" in line:  # never serve an empty or malformed reply to paraphrases
+            sem.add(ns, english_text, line, vec)
+        return line
+    return extract_container_line(call_provider(provider, sys_txt, usr_txt, model, on_token))
+
+
+PROMPT_BREAK = "###PROMPT_BREAK###"
+
+
+def author_shimmer_packed(system_txt: str, english_texts: list[str], provider: str, model: str,
+                          routing: str | None = None, action: str | None = None, deadline: int | None = None,
+                          deliver: list[str] | None = None, session: str | None = None) -> list[str]:
+    """Author several inputs in one request (one RPM slot); falls back to per-input calls if the reply doesn't split cleanly."""
+    hints = dict(routing=routing, action=action, deadline=deadline, deliver=deliver, session=session)
+    if len(english_texts) == 1:
+        return [author_shimmer(system_txt, english_texts[0], provider, model, **hints)]
+    n = len(english_texts)
+    sys_txt, usr_txt = build_authoring_prompt(system_txt, f"\n{PROMPT_BREAK}\n".join(english_texts), **hints)
+    usr_txt += (f"\n\nThe input holds {n} separate requests separated by '{PROMPT_BREAK}'. Convert each one. "
+                f"Respond with exactly {n} Shimmer lines, one per input in order, separated by '{PROMPT_BREAK}'.")
+    out = call_provider(provider, sys_txt, usr_txt, model)
+    lines = [extract_container_line(part) for part in out.split(PROMPT_BREAK) if part.strip()]
+    if len(lines) == n and all("→[" in line for line in lines):
+        return lines
+    return [author_shimmer(system_txt, text, provider, model, **hints) for text in english_texts]
+
+
+def gloss_shimmer_packed(system_txt: str, shimmer_msgs: list[str], provider: str, model: str) -> list[dict] | None:
+    """Gloss several messages in one request as a JSON array; None if the reply doesn't line up with the inputs."""
+    n = len(shimmer_msgs)
+    numbered = "\n".join(f"{i}. {msg}" for i, msg in enumerate(shimmer_msgs, 1))
+    sys_txt, usr_txt = build_glossing_prompt(system_txt, shimmer_msg=numbered)
+    usr_txt += (f"\n\nThe input holds {n} numbered messages. Return a JSON array with exactly {n} objects, "
+                "one per input, preserving order: [{...},{...}]")
+    out = call_provider(provider, sys_txt, usr_txt, model)
+    for m in _JSON_ARRAY_START_RE.finditer(out):
+        try:
+            arr, _ = _JSON_DECODER.raw_decode(out, m.start())
+        except json.JSONDecodeError:
+            continue
+        if isinstance(arr, list) and len(arr) == n and all(isinstance(obj, dict) for obj in arr):
+            return arr
+    return None
+
+
 def extract_container_line(text: str) -> str:
     for line in text.splitlines():
         if "→[" in line and "]" in line:
@@ -147,61 +496,136 @@ def extract_container_line(text: str) -> str:
 
 
 def extract_json(text: str) -> str:
-    m = re.search(r"\{[\s\S]*\}", text)
+    m = _JSON_BLOCK_RE.search(text)
     if m:
         return m.group(0)
     return text.strip()
 
 
+def parse_json_object(text: str) -> dict | None:
+    """Decode the first JSON object in text in one pass (no extract + re-parse); None if there isn't one."""
+    i = text.find("{")
+    if i < 0:
+        return None
+    try:
+        obj, _ = _JSON_DECODER.raw_decode(text, i)
+    except json.JSONDecodeError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
 def main():
     ap = argparse.ArgumentParser(prog="shimmer-cli", description="English ↔ Shimmer using LLMs")
     sub = ap.add_subparsers(dest="cmd", required=True)
 
     common = argparse.ArgumentParser(add_help=False)
-    common.add_argument("--provider", choices=["ollama", "openai"], default="ollama")
-    common.add_argument("--model", default="qwen2.5:latest")
+    common.add_argument("--provider", choices=["ollama", "openai", "bedrock"], default="ollama")
+    common.add_argument("--model", default=None,
+                        help=f"model name (default: {DEFAULT_MODEL}; {BEDROCK_DEFAULT_MODEL} for bedrock)")
+    common.add_argument("--region", default=None, help="AWS region for --provider bedrock")
+    common.add_argument("--no-cache", action="store_true", help="bypass the on-disk response cache")
+    common.add_argument("--cache-ttl", type=int, default=None, metavar="SECONDS",
+                        help="treat cached responses older than this as misses")
+    common.add_argument("--no-stream", action="store_true",
+                        help="don't echo the model's raw output to stderr while it generates")
 
     a = sub.add_parser("en2sh", parents=[common], help="English → Shimmer")
-    a.add_argument("text", help="English text to convert")
+    a.add_argument("text", nargs="?", help="English text to convert")
+    a.add_argument("--inputs", metavar="FILE", help="convert each line of FILE instead (one Shimmer line per input line)")
+    a.add_argument("--concurrency", type=int, default=None,
+                   help="parallel requests with --inputs (default: 4 for ollama, 16 for API providers)")
+    a.add_argument("--rpm", type=int, default=None, help="max requests/minute (default: 60 for openai, unlimited for ollama; 0 = unlimited)")
+    a.add_argument("--tpm", type=int, default=None, help="max tokens/minute (default: 60000 for openai, unlimited for ollama; 0 = unlimited)")
+    a.add_argument("--batch-api", action="store_true",
+                   help="with --inputs and --provider openai: complete the file as one OpenAI Batch job "
+                        "(half price, up to 24h; rerun to resume)")
     a.add_argument("--routing", default=None)
     a.add_argument("--action", default=None)
     a.add_argument("--deadline", type=int, default=None)
     a.add_argument("--deliver", action="append", default=None, help="e.g., f01 (repeatable)")
     a.add_argument("--session", default=None)
+    a.add_argument("--semantic-cache-threshold", type=float, default=0.92,
+                   help="reuse cached output for paraphrases at this cosine similarity (needs numpy + an embedder; 0 disables)")
+    a.add_argument("--semantic-cache-model", default=llm_cache.SEMANTIC_MODEL,
+                   help="sentence-transformers model, or ollama:<name> (e.g. ollama:nomic-embed-text)")
 
     b = sub.add_parser("sh2en", parents=[common], help="Shimmer → English")
     b.add_argument("message", help="Shimmer message '<container>→[vector]' to gloss")
 
     args = ap.parse_args()
+    if args.no_cache:
+        llm_cache.disable()
+    llm_cache.set_ttl(args.cache_ttl)
+    if args.model is None:
+        args.model = BEDROCK_DEFAULT_MODEL if args.provider == "bedrock" else DEFAULT_MODEL
+    set_bedrock_region(args.region)
+
+    system_txt = load_system_prompt()
 
-    sections = read_prompt_sections(PROMPT_PATH)
-    system_txt = sections.get("System (Common)") or sections.get("System") or "You are a strict Shimmer protocol agent."
+    streamed = []
+
+    def echo(piece: str) -> None:
+        # Raw tokens go to stderr so stdout carries only the final extracted line/JSON
+        streamed.append(piece)
+        sys.stderr.write(piece)
+        sys.stderr.flush()
+
+    def end_echo() -> None:
+        if streamed:
+            sys.stderr.write("\n")
+    on_token = None if args.no_stream else echo
 
     if args.cmd == "en2sh":
-        sys_txt, usr_txt = build_authoring_prompt(
-            system_txt,
-            english_text=args.text,
-            routing=args.routing,
-            action=args.action,
-            deadline=args.deadline,
-            deliver=args.deliver,
-            session=args.session,
-        )
-        if args.provider == "ollama":
-            out = call_ollama(sys_txt, usr_txt, model=args.model)
-        else:
-            out = call_openai(sys_txt, usr_txt, model=args.model)
-        print(extract_container_line(out))
+        if (args.text is None) == (args.inputs is None):
+            ap.error("en2sh: give either TEXT or --inputs FILE")
+        if args.batch_api and (args.inputs is None or args.no_cache):
+            ap.error("--batch-api requires --inputs FILE and the response cache (drop --no-cache)")
+        # http_post doesn't retry, so pace --inputs workers below the provider's 429 threshold
+        set_rate_limit(args.provider, args.rpm, args.tpm)
+        llm_cache.enable_semantic(args.semantic_cache_threshold, args.semantic_cache_model)
+
+        def convert(english_text: str, on_token=None) -> str:
+            return author_shimmer(
+                system_txt,
+                english_text=english_text,
+                provider=args.provider,
+                model=args.model,
+                routing=args.routing,
+                action=args.action,
+                deadline=args.deadline,
+                deliver=args.deliver,
+                session=args.session,
+                on_token=on_token,
+            )
+
+        if args.text is not None:
+            out = convert(args.text, on_token)
+            end_echo()
+            print(out)
+            return
+        with open(args.inputs, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+        if args.batch_api and args.provider != "openai":
+            print(f"--batch-api: no batch endpoint for {args.provider}; using live calls", file=sys.stderr)
+        elif args.batch_api:
+            import openai_batch
+            # Results land in the response cache; the loop below then completes from it
+            pairs = [build_authoring_prompt(system_txt, line, args.routing, args.action, args.deadline,
+                                            args.deliver, args.session) for line in lines if line]
+            openai_batch.prefetch(pairs, args.model, prefix="en2sh")
+        # Calls are latency-bound; Ollama serializes generation, so fewer workers suffice there
+        workers = args.concurrency or (4 if args.provider == "ollama" else 16)
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            for out in ex.map(lambda line: convert(line) if line else "", lines):
+                print(out, flush=True)
         return
 
     if args.cmd == "sh2en":
         sys_txt, usr_txt = build_glossing_prompt(system_txt, shimmer_msg=args.message)
-        if args.provider == "ollama":
-            out = call_ollama(sys_txt, usr_txt, model=args.model)
-        else:
-            out = call_openai(sys_txt, usr_txt, model=args.model)
-        js = extract_json(out)
-        print(js)
+        out = call_provider(args.provider, sys_txt, usr_txt, args.model, on_token)
+        end_echo()
+        print(extract_json(out))
         return
 
 
@@ -8,19 +8,29 @@ Exit: 0 if all ok or --min-score not set; 1 if any score < --min-score
 
 Usage:
   python3 sjl_policy_lint.py --file SkippyTM/coord.sjl --min-score 80 | jq .
+  python3 sjl_policy_lint.py --file big.sjl --jobs 0   # score on all cores
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import multiprocessing
+import os
 import re
 import sys
 
 ARROW = "→"
 
-ALLOWED_TOKEN_RE = re.compile(r"^(rn\d+|s:[a-z0-9]+|s\d+|@s\d+|[fdrm]\d{2}|ctag[.:|a-zA-Z0-9_()\-]+)$")
-LETTERS_UNDERSCORE_RE = re.compile(r"^[A-Za-z_]+$")
+# A verbose token is a whole metadata token ([A-Za-z0-9_:.@]+ run) made only of letters/underscores
+# and longer than 24 chars. Allowed tokens (rn#, s:…, s#, @s#, f/d/r/m##, ctag…) all contain a digit
+# or colon except ctag…, hence the (?!ctag). One scan, no per-token matching.
+VERBOSE_TOKEN_RE = re.compile(r"(?<![A-Za-z0-9_:.@])(?!ctag)[A-Za-z_]{25,}(?![A-Za-z0-9_:.@])")
+
+# Output lines are written in batches of this many
+WRITE_BATCH = 1024
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
 
 
 def score_line(line: str) -> tuple[int, list[str]]:
@@ -43,12 +53,9 @@ def score_line(line: str) -> tuple[int, list[str]]:
             issues.append("uppercase_action")
     # tokens compactness
     meta = left[3:]
-    tokens = re.findall(r"[A-Za-z0-9_:.@]+", meta)
-    for t in tokens:
-        if not ALLOWED_TOKEN_RE.match(t):
-            if LETTERS_UNDERSCORE_RE.match(t) and len(t) > 24:
-                score -= 10
-                issues.append(f"verbose_token:{t}")
+    for t in VERBOSE_TOKEN_RE.findall(meta):
+        score -= 10
+        issues.append(f"verbose_token:{t}")
     # vector dp checks
     v = right.strip()
     if v.startswith("[") and v.endswith("]"):
@@ -65,6 +72,10 @@ def score_line(line: str) -> tuple[int, list[str]]:
     return max(score, 0), issues
 
 
+def _scored(line: str) -> tuple[str, int, list[str]]:
+    return (line, *score_line(line))
+
+
 def iter_lines(path: str | None):
     if path:
         with open(path, "r", encoding="utf-8") as f:
@@ -79,17 +90,35 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--file")
     ap.add_argument("--min-score", type=int, default=None)
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="worker processes for scoring (default 1; 0 = all cores); output order is preserved")
     args = ap.parse_args()
 
+    lines = (line for line in iter_lines(args.file) if line.strip())
+    jobs = args.jobs or os.cpu_count() or 1
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        results = pool.imap(_scored, lines, chunksize=1024)
+    else:
+        results = map(_scored, lines)
+
     all_ok = True
-    for line in iter_lines(args.file):
-        if not line.strip():
-            continue
-        score, issues = score_line(line)
+    out = []
+    for line, score, issues in results:
         ok = (args.min_score is None) or (score >= args.min_score)
         if not ok:
             all_ok = False
-        print(json.dumps({"line": line, "ok": ok, "score": score, "issues": issues}, ensure_ascii=False))
+        # Same text as json.dumps({"line", "ok", "score", "issues"}, ensure_ascii=False), without the dict
+        out.append(f'{{"line": {_encode(line)}, "ok": {"true" if ok else "false"}, '
+                   f'"score": {score}, "issues": {_encode(issues)}}}\n')
+        if len(out) >= WRITE_BATCH:
+            sys.stdout.writelines(out)
+            out.clear()
+    sys.stdout.writelines(out)
+    if pool is not None:
+        pool.close()
+        pool.join()
     if args.min_score is not None and not all_ok:
         sys.exit(1)
 
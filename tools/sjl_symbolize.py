@@ -7,13 +7,33 @@ Usage:
   echo "<SJL line>" | tools/sjl_symbolize.py
   tools/sjl_symbolize.py input.sjl > output.sjl
 """
+import mmap
+import os
 import re
+import stat
 import sys
 from typing import Iterable
 
 
 # Match a ctag.* run up to (but not including) τ, the arrow, or the vector '['
 CTAG_RE = re.compile(r"(ctag\.[^τ\[→]*)")
+# Same match over UTF-8 bytes: τ is CF 84 and → is E2 86 92. CF and E2 are only ever lead
+# bytes, so any other character starting with them stays inside the run.
+CTAG_RE_B = re.compile(rb"ctag\.(?:[^\[\xcf\xe2]|\xcf(?!\x84)|\xe2(?!\x86\x92))*")
+PART_SEP_RE = re.compile(r"[:_]")
+
+
+# Keyword → flag; symbolize_ctag collects the flags present in one pass over the parts
+_KW = {
+    "failed": "failed",
+    "urgent": "urgent",
+    "ready": "ok", "ack": "ok",
+    "loop": "loop", "loops": "loop", "looping": "loop", "pending": "loop",
+    "fix": "rep_fix", "rep": "rep_fix", "repetition": "rep_fix",
+    "impl": "impl", "implement": "impl",
+    "params": "params", "parameters": "params",
+    "archive": "arch", "arch": "arch",
+}
 
 
 def symbolize_ctag(token: str) -> str:
@@ -21,43 +41,36 @@ def symbolize_ctag(token: str) -> str:
     body = token[len("ctag."):]
 
     # Basic splits
-    parts = re.split(r"[:_]", body)
-    parts = [p for p in parts if p]
+    parts = PART_SEP_RE.split(body)
+    flags = {_KW[p] for p in parts if p in _KW}
+    if not flags:
+        return token
 
     out_tokens: list[str] = []
 
-    # Status keywords → ctag.σ:…
-    if any(p in {"status", "urgent", "failed", "ready", "ack"} for p in parts):
-        if "failed" in parts:
-            out_tokens.append("ctag.σ:✗")
-        elif "urgent" in parts:
-            out_tokens.append("ctag.σ:‼")
-        elif "ready" in parts:
-            out_tokens.append("ctag.σ:✓")
-        elif "ack" in parts:
-            out_tokens.append("ctag.σ:✓")
+    # Status keywords → ctag.σ:… (failed > urgent > ready/ack)
+    if "failed" in flags:
+        out_tokens.append("ctag.σ:✗")
+    elif "urgent" in flags:
+        out_tokens.append("ctag.σ:‼")
+    elif "ok" in flags:
+        out_tokens.append("ctag.σ:✓")
 
     # Loop/pend detection
-    if any(p in {"loop", "loops", "looping", "pending"} for p in parts):
+    if "loop" in flags:
         out_tokens.append("ctag.σ:⟳")
 
-    # Implementation/fix → μ
-    if any(p in {"impl", "implement", "fix", "rep", "repetition"} for p in parts):
-        # crude short-code
-        code = "rep_fix" if "rep" in parts or "repetition" in parts or "fix" in parts else "impl"
-        out_tokens.append(f"ctag.μ:{code}")
+    # Implementation/fix → μ (crude short-code)
+    if "rep_fix" in flags:
+        out_tokens.append("ctag.μ:rep_fix")
+    elif "impl" in flags:
+        out_tokens.append("ctag.μ:impl")
 
     # Knowledge/query domain → κ (params/arch)
-    if any(p in {"ask", "params", "parameters", "archive", "arch"} for p in parts):
-        sub = []
-        if any(p in {"params", "parameters"} for p in parts):
-            sub.append("params")
-        if any(p in {"archive", "arch"} for p in parts):
-            sub.append("arch")
-        if sub:
-            out_tokens.append("ctag.κ:" + ":".join(sub))
-
-    
+    sub = [k for k in ("params", "arch") if k in flags]
+    if sub:
+        out_tokens.append("ctag.κ:" + ":".join(sub))
+
     # Fallback: nothing matched → return original token
     return "".join(out_tokens) or token
 
@@ -70,6 +83,10 @@ def symbolize_line(line: str) -> str:
     return CTAG_RE.sub(repl, line)
 
 
+def _symbolize_match_b(m: re.Match[bytes]) -> bytes:
+    return symbolize_ctag(m.group(0).decode("utf-8")).encode("utf-8")
+
+
 def run(lines: Iterable[str]) -> None:
     for raw in lines:
         line = raw.rstrip("\n")
@@ -82,9 +99,34 @@ def run(lines: Iterable[str]) -> None:
             print(line)
 
 
+def run_mapped(path: str) -> None:
+    """File input: scan the mapped bytes and decode only lines that contain a ctag."""
+    st = os.stat(path)
+    if not stat.S_ISREG(st.st_mode):
+        # Pipes, FIFOs and <(...) report size 0 and can't be mapped; read them line by line
+        with open(path, "r", encoding="utf-8") as f:
+            run(f)
+        return
+    if st.st_size == 0:
+        return  # mmap can't map an empty file
+    out = sys.stdout.buffer
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b""):
+                line = raw.rstrip(b"\n")
+                if line.endswith(b"\r"):
+                    line = line[:-1]
+                if b"ctag." in line:
+                    try:
+                        # Substitute on the bytes; only the matched ctag runs are decoded
+                        line = CTAG_RE_B.sub(_symbolize_match_b, line)
+                    except Exception:
+                        pass
+                out.write(line + b"\n")
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        with open(sys.argv[1], "r", encoding="utf-8") as f:
-            run(f)
+        run_mapped(sys.argv[1])
     else:
         run(sys.stdin)